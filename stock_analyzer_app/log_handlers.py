@@ -0,0 +1,20 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueuedStreamHandler(QueueHandler):
+    """
+    Logging handler that only puts formatted records on an in-memory queue.
+    A QueueListener thread writes them to stderr, so the WebSocket and
+    worker threads never block on log I/O.
+    """
+
+    def __init__(self):
+        log_queue = queue.SimpleQueue()
+        super().__init__(log_queue)
+        # Records arrive already formatted by this handler's formatter
+        self.listener = QueueListener(log_queue, logging.StreamHandler())
+        self.listener.start()
+        atexit.register(self.listener.stop)
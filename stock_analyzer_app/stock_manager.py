@@ -1,8 +1,11 @@
+import functools
+import queue
 import threading
-import json
+import msgspec
+import orjson
 import websocket
+import socket
 import ssl
-import time
 import logging
 
 from django.conf import settings
@@ -18,6 +21,46 @@ class MESSAGE_TYPE:
     PING = 'ping'
     SUBSCRIPTION_CONFIRMATION = 'type'
 
+# TCP options for the Finnhub sockets, applied on top of websocket-client's
+# defaults (TCP_NODELAY, SO_KEEPALIVE, keepalive idle/interval/count of
+# 30s/10s/3). Only the keepalive timings are tightened, so a dead peer is
+# detected after ~25s instead of ~60s and reconnects kick in sooner.
+SOCKET_OPTIONS = []
+if hasattr(socket, 'TCP_KEEPIDLE'): # Not available on every platform
+    SOCKET_OPTIONS += [
+        (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 10),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 5),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3),
+    ]
+
+# Finnhub pings are sent as '{"type":"ping"}', they are recognised by this
+# marker in the first bytes of the message without parsing them
+PING_MARKER = '"type":"ping"'
+
+
+class Trade(msgspec.Struct):
+    """
+    A single trade from a Finnhub `trade` message.
+    All fields are optional so that one incomplete trade does not fail the
+    decoding of the whole frame; process_trade_message skips trades without
+    a symbol, price or timestamp.
+    """
+    p: float | None = None         # Last price
+    s: str | None = None           # Symbol
+    t: int | None = None           # Timestamp in Unix milliseconds
+    v: float | None = None         # Volume
+    x: str | None = 'N/A'          # Exchange
+
+
+class Frame(msgspec.Struct):
+    """
+    A Finnhub WebSocket message. Trades are decoded straight into `Trade`
+    structs, fields not declared here are ignored by the decoder.
+    """
+    type: str
+    data: list[Trade] = []
+    msg: str = ''          # Set on `error` messages
+
 class StockManager:
     """
     Singleton class to manage the Finnhub WebSocket connection.
@@ -33,17 +76,26 @@ class StockManager:
     RECONNECT_INITIAL_DELAY = 5    # seconds for first retry
     RECONNECT_MAX_DELAY = 60       # seconds for maximum retry delay
     MAX_RECONNECT_ATTEMPTS = 100   # Maximum number of reconnection attempts
+    MESSAGE_QUEUE_SIZE = 1000      # Received frames waiting for the worker
 
 
     def __new__(cls, api_key: str):
+        # Fast path: once created, the instance is returned without locking
+        instance = cls._instance
+        if instance is not None:
+            return instance
         with cls._lock:
             if cls._instance is None:
-                cls._instance = super(StockManager, cls).__new__(cls)
-                cls._instance.api_key = api_key
-                cls._instance.ws_app = None # WebSocketApp instance
-                cls._instance.running = False
-                cls._instance.thread = None
-                cls._instance._init_manager()
+                instance = super(StockManager, cls).__new__(cls)
+                instance.api_key = api_key
+                instance.ws_apps = {} # WebSocketApp per connection
+                instance.running = False
+                instance.threads = [] # One thread per connection
+                instance.worker_thread = None # Message processing
+                instance._init_manager()
+                # Publish only the fully initialized instance, the fast
+                # path above reads it without holding the lock
+                cls._instance = instance
             return cls._instance
 
     def _init_manager(self):
@@ -52,117 +104,206 @@ class StockManager:
             logger.info("Initializing StockManager...")
 
             # Load configuration from Django settings
-            self.stocks_to_analyze = settings.STOCKS_TO_ANALYZE
+            self.stocks_to_analyze = frozenset(
+                s.upper() for s in settings.STOCKS_TO_ANALYZE
+            )
             self.threshold = settings.PRICE_CHANGE_THRESHOLD
             self.fh_ws_url = (f"{settings.FINNHUB_CONFIG['WEBSOCKET_URL']}"
                               f"?token={self.api_key}")
+            # Distribute symbols across the configured number of
+            # WebSocket connections (round-robin)
+            symbols = sorted(self.stocks_to_analyze)
+            connections = max(1, min(
+                settings.FINNHUB_CONFIG.get('MAX_CONNECTIONS', 1),
+                len(symbols)
+            ))
+            self.symbol_shards = [
+                tuple(symbols[i::connections]) for i in range(connections)
+            ]
+            max_symbols = settings.FINNHUB_CONFIG.get(
+                'MAX_SYMBOLS_PER_CONNECTION'
+            )
+            if max_symbols and len(self.symbol_shards[0]) > max_symbols:
+                logger.warning(
+                    "%d symbols over %d connection(s) exceeds the limit of "
+                    "%d symbols per connection.",
+                    len(symbols), connections, max_symbols
+                )
+            # Subscribe payloads are serialized once and reused on reconnect
+            self._subscribe_messages = {
+                symbol: orjson.dumps(
+                    {"type": "subscribe", "symbol": symbol}
+                ).decode()
+                for symbol in symbols
+            }
+            # Resolve the DataStore singleton once instead of per trade
+            self._ds = DataStore()
+            # Typed decoder, built once and reused for every message
+            self._decoder = msgspec.json.Decoder(Frame)
+            # Set by stop() to interrupt a reconnect backoff immediately
+            self._stop_event = threading.Event()
+            # Raw frames handed from the WebSocket threads to the worker.
+            # Bounded, so a slow worker blocks the receiving threads and
+            # pushes back on the sockets instead of growing memory.
+            self._messages = queue.Queue(maxsize=self.MESSAGE_QUEUE_SIZE)
 
             logger.info(f"Configured to analyze via Finnhub WebSocket.")
             self.start()
 
     def _on_message(self, ws, message):
-        """Callback for when a message is received from the WebSocket."""
+        """
+        Callback for when a message is received from the WebSocket.
+        Only enqueues the raw frame, so the WebSocket thread can go straight
+        back to receiving while the worker thread parses and processes it.
+        Pings are dropped here and never queued or parsed.
+        When the queue is full this blocks until the worker catches up, so
+        Finnhub is slowed down by TCP backpressure.
+        """
+        if isinstance(message, str) and PING_MARKER in message[:32]:
+            logger.debug("Finnhub WS: Ping received")
+            return
+        try:
+            self._messages.put_nowait(message)
+        except queue.Full:
+            logger.warning(
+                "Finnhub WS: Message queue is full (%d frames), waiting for "
+                "the worker.", self._messages.maxsize
+            )
+            self._messages.put(message)
+
+    def _process_messages(self):
+        """
+        Runs in the worker thread and handles queued WebSocket messages
+        until the stop sentinel (None) is received.
+        """
+        while True:
+            message = self._messages.get()
+            if message is None:
+                break
+            self._handle_message(message)
+
+    def _handle_message(self, message):
+        """Parses a WebSocket message and dispatches it by its type."""
         try:
-            data = json.loads(message)
-            message_type = data.get('type')
-            match message_type:
+            frame = self._decoder.decode(message)
+            match frame.type:
                 case MESSAGE_TYPE.TRADE:
-                    self.process_trade_message(data)
+                    self.process_trade_message(frame)
                 case MESSAGE_TYPE.PING:
                     logger.debug("Finnhub WS: Ping received")
                     pass
                 case MESSAGE_TYPE.SUBSCRIPTION_CONFIRMATION:
                     logger.info(
-                        f"Finnhub WS: "
-                        f"{data.get('data', 'Subscription confirmation')}"
+                        "Finnhub WS: %s",
+                        frame.data or 'Subscription confirmation'
                     )
                 case _:
                     logger.warning(
-                        f"Finnhub WS: Received unhandled message type: "
-                        f"{message_type} - {data}")
+                        "Finnhub WS: Received unhandled message type: "
+                        "%s - %s", frame.type, frame
+                    )
 
-        except json.JSONDecodeError as e:
+        except msgspec.DecodeError as e:
             logger.error(
-                f"Finnhub WS: Error decoding JSON message: "
-                f"{e} - Message: {message}"
+                "Finnhub WS: Error decoding JSON message: %s - Message: %s",
+                e, message
             )
         except Exception as e:
             logger.error(
-                f"Finnhub WS: Error processing message: "
-                f"{e} - Message: {message}")
+                "Finnhub WS: Error processing message: %s - Message: %s",
+                e, message
+            )
 
-    def process_trade_message(self, data):
+    def process_trade_message(self, frame: Frame):
         """
         Processes trade messages from the WebSocket.
         This method checks if the symbol is in the list of stocks to analyze,
         and if so, it calculates the price change and generates insights.
         Additionally, this method updates the data store with the latest trade.
-        :param data: The data received from the WebSocket.
+        :param frame: The decoded trade message received from the WebSocket.
         :return: None
         """
-        for trade_data_item in data.get('data', []):
-            symbol = trade_data_item.get('s')
-            ds = DataStore()
-            if symbol and symbol.upper() in self.stocks_to_analyze:
-                # Finnhub trade data structure
-                trade_info = {
-                    "price": trade_data_item.get('p'),
-                    "size": trade_data_item.get('s'),
-                    "timestamp": trade_data_item.get('t'),
-                    "exchange": trade_data_item.get('x', 'N/A'),
-                }
-                last_data = ds.get_data(symbol)
-
-                last_price = last_data.get('data', {}).get('price', None)
-                current_price = trade_info['price']
-
-                # Update the data store with the latest trade info
-                ds.update_data(
-                    symbol, {'type': 'trade', 'data': trade_info}
-                )
-                # If there is last_price to calculate change
-                if last_price is not None:
-                    price_change = current_price - last_price
-                    # Calculate percentage change (div by 0 check)
-                    pct_change = 0
-                    if last_price != 0:
-                        pct_change = (price_change / last_price) * 100
+        # Bind loop invariants to locals once per frame
+        ds = self._ds
+        get_data = ds.get_data
+        update_data = ds.update_data
+        stocks_to_analyze = self.stocks_to_analyze
+        threshold = self.threshold
+        # Debug output is formatted per trade, check the level once per frame
+        debug = logger.isEnabledFor(logging.DEBUG)
+        # Insights of one frame are stored in a single batch
+        new_insights = []
+        for trade in frame.data:
+            symbol = trade.s
+            if not symbol or trade.p is None or trade.t is None:
+                if debug:
+                    logger.debug("Skipping incomplete trade: %s", trade)
+                continue
+            symbol = symbol.upper()
+            if symbol not in stocks_to_analyze:
+                continue
+
+            # Finnhub trade data structure
+            current_price = trade.p
+            trade_info = {
+                "price": current_price,
+                "size": trade.v,
+                "timestamp": trade.t,
+                "exchange": trade.x,
+            }
+            last_data = get_data(symbol)
+
+            last_price = last_data.get('data', {}).get('price', None)
 
+            # Update the data store with the latest trade info
+            update_data(symbol, {'type': 'trade', 'data': trade_info})
+            # If there is last_price to calculate change
+            if last_price is not None:
+                price_change = current_price - last_price
+                # Calculate percentage change (div by 0 check)
+                pct_change = 0
+                if last_price != 0:
+                    pct_change = (price_change / last_price) * 100
+
+                if debug:
                     logger.debug(
-                        f"[{symbol}] Calculated change: "
-                        f"AbsChange={round(price_change, 4)}, "
-                        f"PctChange={round(pct_change, 4)}%"
+                        "[%s] Calculated change: "
+                        "AbsChange=%.4f, PctChange=%.4f%%",
+                        symbol, price_change, pct_change
                     )
 
-                    if abs(pct_change) >= self.threshold:
-                        # Create an Insight object
-                        inf = 'increase' if pct_change > 0 else 'decrease'
-                        insight_obj = Insight(
-                            symbol=symbol.upper(),
-                            initial_price=last_price,
-                            current_price=current_price,
-                            change_percent=round(pct_change, 4),
-                            event_timestamp_ms=trade_info['timestamp'],
-                            message=f"Significant price {inf} of "
-                                    f"{abs(pct_change):.2f}%"
-                        )
-                        ds.add_insight(insight_obj)
-                        logger.info(
-                            f"[{symbol}] {insight_obj.message} "
-                            f"(Old: {last_price}, New: {current_price})"
-                        )
-                    else:
-                        logger.debug(
-                            f"[{symbol}] Change {round(pct_change, 4)}%"
-                            f" is below threshold {self.threshold}%. "
-                            f"No insight generated."
-                        )
-                else:
+                if abs(pct_change) >= threshold:
+                    # Create an Insight object
+                    inf = 'increase' if pct_change > 0 else 'decrease'
+                    insight_obj = Insight(
+                        symbol=symbol,
+                        initial_price=last_price,
+                        current_price=current_price,
+                        change_percent=pct_change,
+                        event_timestamp_ms=trade.t,
+                        message=f"Significant price {inf} of "
+                                f"{abs(pct_change):.2f}%"
+                    )
+                    new_insights.append(insight_obj)
+                    logger.info(
+                        "[%s] %s (Old: %s, New: %s)",
+                        symbol, insight_obj.message, last_price, current_price
+                    )
+                elif debug:
                     logger.debug(
-                        f"[{symbol}] First trade received. "
-                        f"Setting last_price to {current_price}. "
-                        f"No insight calculated yet."
+                        "[%s] Change %.4f%% is below threshold %s%%. "
+                        "No insight generated.",
+                        symbol, pct_change, threshold
                     )
+            elif debug:
+                logger.debug(
+                    "[%s] First trade received. Setting last_price to %s. "
+                    "No insight calculated yet.",
+                    symbol, current_price
+                )
+
+        if new_insights:
+            ds.add_insights(new_insights)
 
     def _on_error(self, ws, error):
         """Callback for WebSocket errors."""
@@ -174,34 +315,42 @@ class StockManager:
             f"Finnhub WS Closed: {close_status_code} - {close_message}"
         )
 
-    def _on_open(self, ws):
-        """Callback for when the WebSocket connection is opened."""
+    def _on_open(self, ws, symbols):
+        """
+        Callback for when the WebSocket connection is opened.
+        Subscribes to the symbols assigned to this connection.
+        """
         logger.info("Finnhub WS connection opened. Subscribing...")
-        for symbol in self.stocks_to_analyze:
-            ws.send(json.dumps({"type":"subscribe","symbol":symbol.upper()}))
-            logger.info(f"Subscribed to {symbol.upper()}")
+        for symbol in symbols:
+            ws.send(self._subscribe_messages[symbol])
+            logger.info("Subscribed to %s", symbol)
 
-    def _run_websocket_in_thread(self):
+    def _run_websocket_in_thread(self, connection_id, symbols):
         """
-        Runs the WebSocketApp in a dedicated thread.
+        Runs a WebSocketApp for one connection (subscribed to `symbols`)
+        in a dedicated thread.
         This method blocks until the WebSocket connection closes.
         """
         reconnect_attempt = 0
         current_delay = self.RECONNECT_INITIAL_DELAY
         while self.running:
             try:
-                self.ws_app = websocket.WebSocketApp(
+                ws_app = websocket.WebSocketApp(
                     self.fh_ws_url,
                     on_message=self._on_message,
                     on_error=self._on_error,
                     on_close=self._on_close,
-                    on_open=self._on_open
+                    on_open=functools.partial(self._on_open, symbols=symbols)
                 )
+                self.ws_apps[connection_id] = ws_app
                 logger.info(
-                    f"Attempting WS connection "
+                    f"Attempting WS connection {connection_id} "
                     f"(Attempt {reconnect_attempt + 1})..."
                 )
-                self.ws_app.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+                ws_app.run_forever(
+                    sockopt=SOCKET_OPTIONS,
+                    sslopt={"cert_reqs": ssl.CERT_NONE}
+                )
                 logger.info("Finnhub WebSocketApp run_forever exited.")
                 if not self.running:
                     logger.info(
@@ -229,7 +378,11 @@ class StockManager:
                     f"Reconnecting in {current_delay}s "
                     f"(Attempt {reconnect_attempt})..."
                 )
-                time.sleep(current_delay)
+                if self._stop_event.wait(current_delay):
+                    logger.info(
+                        "StockManager stopped during reconnect backoff."
+                    )
+                    break
                 current_delay = min(
                     current_delay * 2, self.RECONNECT_MAX_DELAY
                 )
@@ -244,29 +397,60 @@ class StockManager:
             #     self.running = False
 
     def start(self):
-        """Starts the Finnhub WebSocket client in a new daemon thread."""
+        """
+        Starts a Finnhub WebSocket client per symbol shard and the message
+        processing worker in new daemon threads.
+        """
         if not self.running:
             self.running = True
-            self.thread = threading.Thread(
-                target=self._run_websocket_in_thread, daemon=True
+            self._stop_event.clear()
+            self.worker_thread = threading.Thread(
+                target=self._process_messages, daemon=True
+            )
+            self.worker_thread.start()
+            self.threads = []
+            for connection_id, symbols in enumerate(self.symbol_shards):
+                thread = threading.Thread(
+                    target=self._run_websocket_in_thread,
+                    args=(connection_id, symbols),
+                    daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+            logger.info(
+                "StockManager launched %d connection thread(s).",
+                len(self.threads)
             )
-            self.thread.start()
-            logger.info("StockManager thread launched.")
 
     def stop(self):
         """Stops the Finnhub WebSocket client."""
         if self.running:
             logger.info("Stopping StockManager...")
             self.running = False
-            if self.ws_app:
+            self._stop_event.set()
+            for ws_app in list(self.ws_apps.values()):
                 logger.info("Closing WebSocket connection...")
-                self.ws_app.close()
-            if self.thread:
-                self.thread.join(timeout=5)
-                if self.thread.is_alive():
+                ws_app.close()
+            for thread in self.threads:
+                thread.join(timeout=5)
+                if thread.is_alive():
                     logger.warning(
                         "StockManager thread did not terminate gracefully."
                     )
+            if self.worker_thread:
+                # Let the worker drain already received messages, then exit
+                try:
+                    self._messages.put(None, timeout=5)
+                except queue.Full:
+                    logger.warning(
+                        "StockManager worker is not draining its queue."
+                    )
+                self.worker_thread.join(timeout=5)
+                if self.worker_thread.is_alive():
+                    logger.warning(
+                        "StockManager worker thread did not terminate "
+                        "gracefully."
+                    )
             logger.info("StockManager stopped.")
 
 stock_manager_instance = None
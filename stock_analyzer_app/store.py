@@ -1,82 +1,275 @@
+import bisect
 import collections
+import operator
+import sys
+import orjson
 import time
 import threading
 import logging
+from collections.abc import MutableSequence
+from typing import cast
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Sort key of the insight buffers
+_event_ts = operator.attrgetter('event_timestamp_ms')
+
+def canonical_symbol(symbol: str) -> str:
+    """
+    Returns the uppercase form of a symbol. A symbol that is already
+    uppercase is returned as is: upper() always builds a new string, which
+    would drop an interned object and its cached hash before dict lookups.
+    """
+    return symbol if symbol.isupper() else symbol.upper()
+
+class RingBuffer:
+    """
+    Bounded FIFO buffer backed by a preallocated list.
+    Appending to a full buffer overwrites (drops) its oldest item, like a
+    deque with maxlen, but the items live in one contiguous list, so a
+    snapshot is at most two list slices instead of a walk over the deque's
+    linked blocks.
+    Not safe for concurrent readers: DataStore only reads it on the writer
+    thread and publishes snapshot() tuples to readers.
+    """
+    __slots__ = ['_buf', '_head', '_size', 'maxlen']
+
+    def __init__(self, maxlen: int):
+        self._buf = [None] * maxlen
+        self._head = 0  # Index of the oldest item
+        self._size = 0
+        self.maxlen = maxlen
+
+    def __len__(self):
+        return self._size
+
+    def _index(self, index: int) -> int:
+        size = self._size
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('RingBuffer index out of range')
+        return (self._head + index) % self.maxlen
+
+    def __getitem__(self, index: int):
+        return self._buf[self._index(index)]
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def snapshot(self) -> tuple:
+        """Returns the items, oldest first, as a tuple."""
+        buf, head = self._buf, self._head
+        end = head + self._size
+        if end <= self.maxlen:
+            return tuple(buf[head:end])
+        return tuple(buf[head:] + buf[:end - self.maxlen])
+
+    def append(self, item):
+        maxlen = self.maxlen
+        if not maxlen:
+            # Like deque(maxlen=0), a zero-size buffer drops every item
+            return
+        if self._size == maxlen:
+            # Full: the new item takes the oldest item's slot
+            self._buf[self._head] = item
+            self._head = (self._head + 1) % maxlen
+        else:
+            self._buf[(self._head + self._size) % maxlen] = item
+            self._size += 1
+
+    def popleft(self):
+        if not self._size:
+            raise IndexError('pop from an empty RingBuffer')
+        item = self._buf[self._head]
+        self._buf[self._head] = None
+        self._head = (self._head + 1) % self.maxlen
+        self._size -= 1
+        return item
+
+    def insert(self, index: int, item):
+        """
+        Inserts item before index, shifting the newer items by one slot.
+        Used by bisect.insort for (rare) out-of-order insights.
+        """
+        size = self._size
+        if size == self.maxlen:
+            raise IndexError('RingBuffer already at its maximum size')
+        index = min(max(index + size if index < 0 else index, 0), size)
+        buf, head, maxlen = self._buf, self._head, self.maxlen
+        for i in range(size, index, -1):
+            buf[(head + i) % maxlen] = buf[(head + i - 1) % maxlen]
+        buf[(head + index) % maxlen] = item
+        self._size = size + 1
+
+    def clear(self):
+        """
+        Empties the buffer in O(1). The list stays allocated; its stale
+        references are outside [head, head + size) and get overwritten as
+        the buffer refills.
+        """
+        self._head = 0
+        self._size = 0
+
 class Insight:
     """Represents a significant price change insight."""
     __slots__ = ['symbol', 'initial_price', 'current_price', 'change_percent',
-                 'event_timestamp_ms', 'message', 'price_change']
+                 'event_timestamp_ms', 'message', 'price_change',
+                 'event_datetime_utc', '_dict', '_json']
 
     def __init__(self, symbol: str, initial_price: float, current_price: float,
                  change_percent: float, event_timestamp_ms: int, message: str):
-        self.symbol = symbol.upper()
+        # upper() returns a new string each time, interning lets all insights
+        # of a symbol share one string object
+        self.symbol = sys.intern(symbol.upper())
         self.initial_price = initial_price
         self.current_price = current_price
         self.change_percent = change_percent
-        self.price_change = round(current_price - initial_price)
+        self.price_change = current_price - initial_price
         self.event_timestamp_ms = event_timestamp_ms
         self.message = message
-
-    def to_dict(self):
-        return {
+        # Insights are immutable, format the timestamp once instead of on
+        # every to_dict() call
+        self.event_datetime_utc = time.strftime(
+            '%Y-%m-%d %H:%M:%S UTC', time.gmtime(event_timestamp_ms / 1000)
+        )
+        # Built and serialized once here, insights are written once and read
+        # many times
+        self._dict = {
             "symbol": self.symbol,
             "initial_price": self.initial_price,
             "current_price": self.current_price,
-            "change_percent": round(self.change_percent, 4), # Round for cleaner output
-            "price_change": self.price_change,
+            # Values are kept unrounded and only rounded for output
+            "change_percent": round(self.change_percent, 4),
+            "price_change": round(self.price_change),
             "event_timestamp_ms": self.event_timestamp_ms,
-            "event_datetime_utc": time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(self.event_timestamp_ms / 1000)),
+            "event_datetime_utc": self.event_datetime_utc,
             "message": self.message
         }
+        self._json = orjson.dumps(self._dict)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the dict representation of the insight. The same dict is
+        returned on every call and must not be mutated.
+        """
+        return self._dict
+
+    def to_json(self) -> bytes:
+        """Returns the JSON encoded to_dict() representation."""
+        return self._json
 
 class DataStore:
     """
     Singleton class to manage in-memory storage of market data and insights.
-    This class is thread-safe and uses locks to ensure data integrity.
     It stores the latest market data (trades) for each symbol and
-    significant price change insights in a deque with a maximum size.
+    significant price change insights in a ring buffer with a maximum size,
+    ordered by event timestamp.
+    The WebSocket thread is the only writer. After each write it publishes
+    new immutable snapshots (data dict, insight tuples) by atomic reference
+    swaps, so neither side takes a lock and readers only read a reference.
     """
+    __slots__ = ['data', '_data_json', 'insights', 'max_size',
+                 'insights_by_symbol', '_insights_snapshot',
+                 '_symbol_snapshots']
+
     _instance = None
     _lock = threading.Lock()
 
     def __new__(cls):
+        # Fast path: once created, the instance is returned without locking
+        instance = cls._instance
+        if instance is not None:
+            return instance
         with cls._lock:
             if cls._instance is None:
                 logger.info(f"Initializing DataStore...({cls._instance})")
-                cls._instance = super(DataStore, cls).__new__(cls)
-                # Stores latest market data (trades) for each symbol
-                cls._instance.data = {}
-                cls._instance.data_lock = threading.Lock()
-
-                # Stores historical insights (significant price changes)
-                # This needs LRU/max_size as it's a growing list of events
-                cls._instance.insights = collections.deque(maxlen=settings.MAX_STORE_SIZE)
-                cls._instance.insights_lock = threading.Lock()
-                cls._instance.max_size = settings.MAX_STORE_SIZE
+                instance = super(DataStore, cls).__new__(cls)
+                instance._reset()
+                # Publish only the fully initialized instance, the fast
+                # path above reads it without holding the lock
+                cls._instance = instance
                 logger.info(
                     f"DataStore initialized ({cls._instance})")
             return cls._instance
 
+    def _reset(self):
+        """Initializes (or empties) the market data and insight storage."""
+        # Stores latest market data (trades) for each symbol
+        self.data = {}
+        # (data, JSON of data) of the last get_data_json() call
+        self._data_json = None
+
+        # Stores historical insights (significant price changes)
+        # This needs LRU/max_size as it's a growing list of events
+        self.insights = RingBuffer(settings.MAX_STORE_SIZE)
+        self.max_size = settings.MAX_STORE_SIZE
+        # The same insights indexed per symbol, so symbol filtered
+        # queries only walk that symbol's insights
+        max_size = self.max_size
+        self.insights_by_symbol = collections.defaultdict(
+            lambda: RingBuffer(max_size)
+        )
+        # Read-only copies of the buffers above for readers,
+        # replaced after every write
+        self._insights_snapshot = ()
+        self._symbol_snapshots = {}
+
+    @classmethod
+    def reset_for_testing(cls):
+        """
+        Returns the DataStore emptied in place (created if needed).
+        The buffers are truncated, and only rebuilt when
+        settings.MAX_STORE_SIZE no longer matches their size.
+        """
+        instance = cls()
+        if instance.max_size != settings.MAX_STORE_SIZE:
+            instance._reset()
+            return instance
+        instance.data = {}
+        instance._data_json = None
+        instance.insights.clear()
+        instance.insights_by_symbol.clear()
+        instance._insights_snapshot = ()
+        instance._symbol_snapshots = {}
+        return instance
+
     def update_data(self, symbol: str, data: dict):
         """
         Updates the latest market data for a given symbol.
+        The data dict is replaced rather than mutated (copy-on-write), so
+        references handed out by get_data stay valid snapshots.
         """
-        symbol = symbol.upper()
-        with self.data_lock:
-            self.data[symbol] = data
+        # Keyed by the interned symbol, like the insight indexes, so lookups
+        # with the canonical symbol of a view match the key by identity
+        symbol = sys.intern(canonical_symbol(symbol))
+        # Reference assignment is atomic, readers never see a partial update
+        self.data = {**self.data, symbol: data}
 
-    def get_data(self, symbol: str = None):
+    def get_data(self, symbol: str | None = None) -> dict:
         """
         Retrieves the latest market data for a specific symbol or all data.
+        Returned dicts are read-only snapshots and must not be mutated.
         """
-        with self.data_lock:
-            if symbol:
-                return self.data.get(symbol.upper(), {})
-            return dict(self.data) # Return a copy of all data
+        if symbol:
+            return self.data.get(canonical_symbol(symbol), {})
+        return self.data
+
+    def get_data_json(self) -> bytes:
+        """
+        Returns all market data encoded as JSON.
+        The encoding is cached until the data changes: data is replaced on
+        every update, so the cache is valid while it was built from the
+        current data dict. This also keeps a reader that races an update
+        from caching stale JSON.
+        """
+        data = self.data
+        cached = self._data_json
+        if cached is None or cached[0] is not data:
+            cached = (data, orjson.dumps(data))
+            self._data_json = cached
+        return cached[1]
 
     def get_last_price(self, symbol: str) -> dict | None:
         """
@@ -84,62 +277,168 @@ class DataStore:
         Returns None if no trade data is found.
         """
         symbol = symbol.upper()
-        with self.data_lock:
-            data = self.data.get(symbol)
-            if data and data.get('type') == 'trade':
-                return data['data']['price'] # Return the 'data' part of the trade object
-            return None
-
-    def add_insight(self, insight: Insight):
-        """
-        Adds a new insight to the insights deque.
-        Deque handles maxlen automatically.
-        """
-        with self.insights_lock:
-            self.insights.append(insight)
-            logger.info(
-                f"DataStore: Added insight for {insight.symbol}. "
-                f"Current insights count: {len(self.insights)}"
+        data = self.data.get(symbol)
+        if data and data.get('type') == 'trade':
+            return data['data']['price'] # Return the 'data' part of the trade object
+        return None
+
+    @staticmethod
+    def _insert_ordered(series: RingBuffer, insight: Insight) -> None:
+        """
+        Adds an insight to a buffer kept ordered by event timestamp.
+        Insights normally arrive in order and are appended; a late one
+        (e.g. from another connection) is inserted at its position.
+        """
+        if series and insight.event_timestamp_ms < series[-1].event_timestamp_ms:
+            # RingBuffer provides the (index, insert) subset of
+            # MutableSequence that insort uses
+            bisect.insort(
+                cast(MutableSequence[Insight], series), insight, key=_event_ts
             )
+        else:
+            series.append(insight)
+
+    def _append_insight(self, insight: Insight, changed: set[str]) -> None:
+        """
+        Adds an insight to the insights buffer and its symbol's buffer.
+        When the insights buffer is full its oldest insight, which is also
+        the oldest of its symbol, is dropped from both buffers to keep them
+        in sync.
+        Symbols whose buffer changed are added to `changed`.
+        """
+        insights = self.insights
+        if not insights.maxlen:
+            # MAX_STORE_SIZE = 0: insights are not stored
+            return
+        if len(insights) == insights.maxlen:
+            evicted = insights.popleft()
+            self.insights_by_symbol[evicted.symbol].popleft()
+            changed.add(evicted.symbol)
+        self._insert_ordered(insights, insight)
+        self._insert_ordered(self.insights_by_symbol[insight.symbol], insight)
+        changed.add(insight.symbol)
 
+    def _publish_insights(self, changed: set[str]) -> None:
+        """
+        Publishes new snapshots of the insights buffer and of the changed
+        symbols' buffers. Writes are batched per WebSocket frame, so this
+        O(n) copy runs once per frame instead of once per read.
+        """
+        by_symbol = self.insights_by_symbol
+        self._symbol_snapshots = {
+            **self._symbol_snapshots,
+            **{symbol: by_symbol[symbol].snapshot() for symbol in changed}
+        }
+        self._insights_snapshot = self.insights.snapshot()
+
+    def add_insight(self, insight: Insight) -> None:
+        """
+        Adds a new insight to the insights buffer.
+        """
+        changed: set[str] = set()
+        self._append_insight(insight, changed)
+        self._publish_insights(changed)
+        logger.info(
+            "DataStore: Added insight for %s. Current insights count: %d",
+            insight.symbol, len(self.insights)
+        )
+
+    def add_insights(self, insights: list[Insight]) -> None:
+        """
+        Adds a batch of insights (e.g. all insights of one WebSocket frame)
+        with a single log line.
+        """
+        changed: set[str] = set()
+        for insight in insights:
+            self._append_insight(insight, changed)
+        self._publish_insights(changed)
+        logger.info(
+            "DataStore: Added %d insights. Current insights count: %d",
+            len(insights), len(self.insights)
+        )
+
+
+    def _get_insights_page(
+            self,
+            symbol: str | None = None,
+            from_timestamp: int | None = None,
+            to_timestamp: int | None = None,
+            limit: int | None = None,
+            offset: int | None = 0
+    ) -> tuple[Insight, ...]:
+        """
+        Returns the Insight objects matching the filters and pagination of
+        get_filtered_insights, most recent first.
+        Raises ValueError for a negative limit or offset.
+        """
+        if (limit is not None and limit < 0
+                or offset is not None and offset < 0):
+            raise ValueError("limit and offset must not be negative")
+        # The writer can keep publishing new snapshots while we filter this
+        # one
+        if symbol:
+            snapshot = self._symbol_snapshots.get(
+                canonical_symbol(symbol), ()
+            )
+        else:
+            snapshot = self._insights_snapshot
+        # Insights are ordered by timestamp, so the time filter is a binary
+        # search for the window [lo, hi). A bound that lies beyond the oldest
+        # / newest insight excludes nothing and is resolved by looking at
+        # that end only, e.g. for queries of the most recent insights.
+        lo, hi = 0, len(snapshot)
+        if (from_timestamp and hi
+                and snapshot[0].event_timestamp_ms < from_timestamp):
+            lo = bisect.bisect_left(snapshot, from_timestamp, key=_event_ts)
+        if (to_timestamp and hi
+                and snapshot[-1].event_timestamp_ms > to_timestamp):
+            hi = bisect.bisect_right(snapshot, to_timestamp, key=_event_ts)
+        # Most recent first: the page is taken from the newest end of the
+        # window
+        end = max(hi - (offset or 0), lo)
+        begin = max(end - limit, lo) if limit else lo
+        return snapshot[begin:end][::-1]
 
     def get_filtered_insights(
             self,
-            symbol: str = None,
-            from_timestamp: int = None,
-            to_timestamp: int = None,
-            limit: int = None,
-            offset: int = 0
-    ):
+            symbol: str | None = None,
+            from_timestamp: int | None = None,
+            to_timestamp: int | None = None,
+            limit: int | None = None,
+            offset: int | None = 0
+    ) -> list[dict]:
         """
         Retrieves insights, optionally filtered by symbol and/or timestamp range,
         with pagination (limit and offset).
+        The returned dicts are shared with the store and must not be mutated.
         """
-        filtered = []
-        with self.insights_lock:
-            # Iterate in reverse to get most recent first, then filter
-            for insight in reversed(self.insights):
-                # Symbol filter
-                if symbol and insight.symbol != symbol.upper():
-                    continue
-
-                # Timestamp filters
-                if from_timestamp and insight.event_timestamp_ms < from_timestamp:
-                    continue
-                if to_timestamp and insight.event_timestamp_ms > to_timestamp:
-                    continue
-
-                filtered.append(insight.to_dict())
-
-        # Apply offset and limit after filtering
-        if offset:
-            filtered = filtered[offset:]
-        if limit:
-            filtered = filtered[:limit]
+        filtered = [
+            insight.to_dict() for insight in self._get_insights_page(
+                symbol, from_timestamp, to_timestamp, limit, offset
+            )
+        ]
 
         logger.debug(
-            f"Retrieved {len(filtered)} insights "
-            f"(symbol={symbol}, from={from_timestamp}, to={to_timestamp}, "
-            f"limit={limit}, offset={offset})"
+            "Retrieved %d insights "
+            "(symbol=%s, from=%s, to=%s, limit=%s, offset=%s)",
+            len(filtered), symbol, from_timestamp, to_timestamp, limit, offset
         )
         return filtered
+
+    def get_filtered_insights_json(
+            self,
+            symbol: str | None = None,
+            from_timestamp: int | None = None,
+            to_timestamp: int | None = None,
+            limit: int | None = None,
+            offset: int | None = 0
+    ) -> list[bytes]:
+        """
+        Same as get_filtered_insights, but returns the pre-serialized JSON
+        of each insight so responses can be assembled without encoding.
+        """
+        return [
+            insight.to_json() for insight in self._get_insights_page(
+                symbol, from_timestamp, to_timestamp, limit, offset
+            )
+        ]
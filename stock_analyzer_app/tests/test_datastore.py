@@ -1,39 +1,94 @@
+import json
+import sys
 import unittest
-from collections import deque
 from datetime import datetime
 from unittest.mock import patch
 
-from stock_analyzer_app.store import DataStore, Insight
+from stock_analyzer_app.store import (
+    DataStore, Insight, RingBuffer, canonical_symbol
+)
 
 class DataStoreTests(unittest.TestCase):
 
     TEST_MAX_SIZE = 3 # Define a constant for the max_size used in tests
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """
-        Set up a fresh DataStore instance before each test,
-        patching Django settings for MAX_STORE_SIZE and ensuring reset.
+        Patch Django settings for MAX_STORE_SIZE once for all tests.
         """
-        DataStore._instance = None
-
-        self.settings_patcher = patch(
+        super().setUpClass()
+        settings_patcher = patch(
             'django.conf.settings.MAX_STORE_SIZE',
-            new=self.TEST_MAX_SIZE
+            new=cls.TEST_MAX_SIZE
         )
-        self.settings_patcher.start()
-        self.addCleanup(self.settings_patcher.stop)
-
-        self.data_store = DataStore()
-        self.data_store.data = {}
-        self.data_store.insights.clear()
+        settings_patcher.start()
+        cls.addClassCleanup(settings_patcher.stop)
 
+    def setUp(self):
+        """
+        Start each test with an empty DataStore.
+        """
+        self.data_store = DataStore.reset_for_testing()
 
     def test_initialization(self):
         """Test that DataStore initializes correctly with patched settings."""
         self.assertEqual(self.data_store.data, {})
-        self.assertIsInstance(self.data_store.insights, deque)
+        self.assertIsInstance(self.data_store.insights, RingBuffer)
         self.assertEqual(self.data_store.insights.maxlen, self.TEST_MAX_SIZE)
 
+    def test_reset_for_testing_truncates_in_place(self):
+        """Test that resetting keeps and empties the existing buffers."""
+        insights = self.data_store.insights
+        self.data_store.update_data("AAPL", {"last_price": 170.0})
+        self.data_store.add_insight(Insight("AAPL", 1.0, 2.0, 1.0, 1000, "I1"))
+
+        data_store = DataStore.reset_for_testing()
+        self.assertIs(data_store, self.data_store)
+        self.assertIs(data_store.insights, insights)
+        self.assertEqual(len(insights), 0)
+        self.assertEqual(data_store.get_data(), {})
+        self.assertEqual(data_store.get_filtered_insights(), [])
+        self.assertEqual(data_store.get_filtered_insights(symbol="AAPL"), [])
+
+    def test_ring_buffer_clear_and_refill(self):
+        """Test that a cleared (wrapped) buffer refills in order."""
+        buffer = RingBuffer(3)
+        for item in range(5):
+            buffer.append(item)
+        buffer.clear()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.snapshot(), ())
+        with self.assertRaises(IndexError):
+            buffer[0]
+
+        buffer.append("a")
+        buffer.append("b")
+        self.assertEqual(buffer.snapshot(), ("a", "b"))
+        self.assertEqual(buffer[-1], "b")
+        buffer.append("c")
+        buffer.append("d")
+        self.assertEqual(buffer.snapshot(), ("b", "c", "d"))
+        self.assertEqual(buffer.popleft(), "b")
+        self.assertEqual(list(buffer), ["c", "d"])
+
+    def test_zero_max_size_drops_insights(self):
+        """Test that MAX_STORE_SIZE = 0 drops insights like deque(maxlen=0)."""
+        buffer = RingBuffer(0)
+        buffer.append("a")
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.snapshot(), ())
+
+        with patch('django.conf.settings.MAX_STORE_SIZE', new=0):
+            data_store = DataStore.reset_for_testing()
+            data_store.add_insight(Insight("AAPL", 1.0, 2.0, 1.0, 1000, "I1"))
+            data_store.add_insights([
+                Insight("MSFT", 1.0, 2.0, 1.0, 2000, "I2")
+            ])
+        self.assertEqual(len(data_store.insights), 0)
+        self.assertEqual(data_store.get_filtered_insights(), [])
+        self.assertEqual(data_store.get_filtered_insights(symbol="AAPL"), [])
+
     def test_update_data_new_symbol(self):
         """Test updating data for a new symbol."""
         self.data_store.update_data(
@@ -82,6 +137,52 @@ class DataStoreTests(unittest.TestCase):
         self.assertEqual(len(self.data_store.insights), 1)
         self.assertEqual(self.data_store.insights[0].symbol, "AAPL")
 
+    def test_insight_to_dict(self):
+        """Test the dict representation of an insight."""
+        insight = Insight("aapl", 100.0, 101.0, 1.0, 1678886400000, "I1")
+        self.assertEqual(insight.to_dict(), {
+            "symbol": "AAPL",
+            "initial_price": 100.0,
+            "current_price": 101.0,
+            "change_percent": 1.0,
+            "price_change": 1,
+            "event_timestamp_ms": 1678886400000,
+            "event_datetime_utc": "2023-03-15 13:20:00 UTC",
+            "message": "I1",
+        })
+
+    def test_insight_symbol_is_shared(self):
+        """Test that insights of a symbol share one symbol string."""
+        insight1 = Insight("aapl", 100.0, 101.0, 1.0, 1678886400000, "I1")
+        insight2 = Insight("AAPL", 100.0, 102.0, 2.0, 1678886401000, "I2")
+        self.assertIs(insight1.symbol, insight2.symbol)
+
+    def test_canonical_symbol(self):
+        """Test that uppercase symbols are returned without copying."""
+        symbol = sys.intern("AAPL")
+        self.assertIs(canonical_symbol(symbol), symbol)
+        self.assertIs(
+            canonical_symbol(symbol),
+            Insight("aapl", 100.0, 101.0, 1.0, 1678886400000, "I1").symbol
+        )
+        self.assertEqual(canonical_symbol("aApl"), "AAPL")
+
+    def test_market_data_symbol_is_interned(self):
+        """Test that market data is keyed by the interned symbol."""
+        self.data_store.update_data("aapl", {"price": 1.0})
+        self.assertIs(
+            next(iter(self.data_store.get_data())), sys.intern("AAPL")
+        )
+
+    def test_add_insights_batch(self):
+        """Test adding a batch of insights in one call."""
+        self.data_store.add_insights([
+            Insight("AAPL", 100.0, 101.0, 1.0, 1678886400000, "I1"),
+            Insight("MSFT", 200.0, 204.0, 2.0, 1678886401000, "I2"),
+        ])
+        self.assertEqual(len(self.data_store.insights), 2)
+        self.assertEqual(self.data_store.insights[-1].symbol, "MSFT")
+
     def test_add_insight_max_size_enforcement(self):
         """Test that max_size is enforced when adding insights."""
         for i in range(self.TEST_MAX_SIZE + 2):
@@ -130,6 +231,31 @@ class DataStoreTests(unittest.TestCase):
         self.assertIn("AAPL", all_data)
         self.assertIn("MSFT", all_data)
 
+    def test_get_data_all_symbols_is_snapshot(self):
+        """Test that later updates do not change a returned snapshot."""
+        self.data_store.update_data(
+            "AAPL", {"last_price": 170.0, "timestamp": 1}
+        )
+        snapshot = self.data_store.get_data()
+        self.data_store.update_data(
+            "MSFT", {"last_price": 280.0, "timestamp": 2}
+        )
+        self.assertEqual(list(snapshot), ["AAPL"])
+        self.assertEqual(len(self.data_store.get_data()), 2)
+
+    def test_get_data_json(self):
+        """Test that the cached JSON of all data follows updates."""
+        self.data_store.update_data("AAPL", {"last_price": 170.0})
+        first = self.data_store.get_data_json()
+        self.assertIs(self.data_store.get_data_json(), first)
+        self.assertEqual(json.loads(first), {"AAPL": {"last_price": 170.0}})
+
+        self.data_store.update_data("MSFT", {"last_price": 280.0})
+        self.assertEqual(
+            json.loads(self.data_store.get_data_json()),
+            {"AAPL": {"last_price": 170.0}, "MSFT": {"last_price": 280.0}}
+        )
+
     def test_get_filtered_insights_no_filters(self):
         """Test getting insights with no filters."""
         insight1 = Insight(
@@ -180,6 +306,56 @@ class DataStoreTests(unittest.TestCase):
         self.assertEqual(len(aapl_insights), 1)
         self.assertEqual(aapl_insights[0]['symbol'], "AAPL")
 
+    def test_get_filtered_insights_symbol_filter_after_eviction(self):
+        """Test that evicted insights are not returned by symbol filter."""
+        for i in range(self.TEST_MAX_SIZE + 1):
+            symbol = "AAPL" if i % 2 == 0 else "MSFT"
+            self.data_store.add_insight(
+                Insight(symbol, 100.0, 101.0, 1.0, 1000 + i, f"I{i}")
+            )
+        # I0 (AAPL) was evicted, the store holds [I1, I2, I3]
+        aapl_insights = self.data_store.get_filtered_insights(symbol="aapl")
+        self.assertEqual([i['message'] for i in aapl_insights], ["I2"])
+        self.assertEqual(
+            self.data_store.get_filtered_insights(symbol="UNKNOWN"), []
+        )
+        self.assertNotIn("UNKNOWN", self.data_store.insights_by_symbol)
+
+    def test_get_filtered_insights_symbol_time_filters_limit_offset(self):
+        """Test symbol, time window and pagination filters together."""
+        for i in range(self.TEST_MAX_SIZE):
+            symbol = "MSFT" if i == 1 else "AAPL"
+            self.data_store.add_insight(
+                Insight(symbol, 100.0, 101.0, 1.0, 1000 + i, f"I{i}")
+            )
+        # AAPL insights: I0 (1000), I2 (1002)
+        insights = self.data_store.get_filtered_insights(
+            symbol="AAPL", from_timestamp=1000, to_timestamp=1002, limit=1
+        )
+        self.assertEqual([i['message'] for i in insights], ["I2"])
+        insights = self.data_store.get_filtered_insights(
+            symbol="AAPL", to_timestamp=1001, limit=1, offset=0
+        )
+        self.assertEqual([i['message'] for i in insights], ["I0"])
+        insights = self.data_store.get_filtered_insights(
+            symbol="AAPL", from_timestamp=1001, offset=1
+        )
+        self.assertEqual(insights, [])
+
+    def test_get_filtered_insights_json(self):
+        """Test that the JSON variant matches the dict variant."""
+        self.data_store.add_insight(
+            Insight("AAPL", 100.0, 101.0, 1.0, 1678886400000, "I1")
+        )
+        self.data_store.add_insight(
+            Insight("MSFT", 200.0, 204.0, 2.0, 1678886401000, "I2")
+        )
+        fragments = self.data_store.get_filtered_insights_json(limit=1)
+        self.assertEqual(
+            [json.loads(fragment) for fragment in fragments],
+            self.data_store.get_filtered_insights(limit=1)
+        )
+
     def test_get_filtered_insights_time_filters(self):
         """Test getting insights filtered by time range."""
         ts1 = int(
@@ -245,18 +421,61 @@ class DataStoreTests(unittest.TestCase):
         self.assertEqual(len(insights), 1)
         self.assertEqual(insights[0]['symbol'], "AAPL")
 
+    def test_add_insight_out_of_order(self):
+        """Test that a late insight is stored in timestamp order."""
+        self.data_store.add_insight(Insight("AAPL", 1.0, 2.0, 1.0, 1000, "I1"))
+        self.data_store.add_insight(Insight("MSFT", 1.0, 2.0, 1.0, 3000, "I3"))
+        self.data_store.add_insight(Insight("AAPL", 1.0, 2.0, 1.0, 2000, "I2"))
+
+        insights = self.data_store.get_filtered_insights()
+        self.assertEqual([i['message'] for i in insights], ["I3", "I2", "I1"])
+        insights = self.data_store.get_filtered_insights(
+            symbol="AAPL", from_timestamp=1500
+        )
+        self.assertEqual([i['message'] for i in insights], ["I2"])
+
+    def test_add_insight_out_of_order_after_wraparound(self):
+        """Test ordered insertion once the buffer has wrapped around."""
+        for i, ts in enumerate((1000, 2000, 3000, 4000, 6000)):
+            self.data_store.add_insight(
+                Insight("TEST", 1.0, 2.0, 1.0, ts, f"I{i}")
+            )
+        self.data_store.add_insight(Insight("TEST", 1.0, 2.0, 1.0, 5000, "L"))
+
+        self.assertEqual(
+            [i.message for i in self.data_store.insights], ["I3", "L", "I4"]
+        )
+        self.assertEqual(self.data_store.insights[-1].message, "I4")
+        self.assertEqual(
+            [i['message'] for i in
+             self.data_store.get_filtered_insights(symbol="TEST")],
+            ["I4", "L", "I3"]
+        )
+
+    def test_get_filtered_insights_time_filters_limit_offset(self):
+        """Test pagination inside a timestamp window."""
+        for i in range(self.TEST_MAX_SIZE):
+            self.data_store.add_insight(
+                Insight("TEST", 1.0, 2.0, 1.0, 1000 + i, f"Message {i}")
+            )
+        insights = self.data_store.get_filtered_insights(
+            to_timestamp=1001, limit=1, offset=1
+        )
+        self.assertEqual([i['message'] for i in insights], ["Message 0"])
+        insights = self.data_store.get_filtered_insights(
+            from_timestamp=1001, offset=5
+        )
+        self.assertEqual(insights, [])
+
+    def test_get_filtered_insights_negative_limit_offset(self):
+        """Test that a negative limit or offset is rejected."""
+        with self.assertRaises(ValueError):
+            self.data_store.get_filtered_insights(limit=-1)
+        with self.assertRaises(ValueError):
+            self.data_store.get_filtered_insights_json(offset=-1)
+
     def test_get_filtered_insights_limit_offset(self):
         """Test limit and offset pagination."""
-        # Ensure the deque is clean for this specific test
-        # Explicitly reset DataStore instances for this test as it
-        # heavily relies on specific deque state
-        DataStore._instances = {}
-        self.settings_patcher.stop()
-        self.settings_patcher.start()
-        self.data_store = DataStore()
-        self.data_store.data = {}
-        self.data_store.insights.clear()
-
         NUM_INSIGHTS_TO_ADD = self.TEST_MAX_SIZE + 2
         for i in range(NUM_INSIGHTS_TO_ADD):
             insight = Insight(
@@ -268,7 +487,7 @@ class DataStoreTests(unittest.TestCase):
                 f"Message {i}"
             )
             self.data_store.add_insight(insight)
-        # If TEST_MAX_SIZE = 3, insights deque will contain
+        # If TEST_MAX_SIZE = 3, insights buffer will contain
         # [Message 2, Message 3, Message 4] (oldest to newest)
         # get_filtered_insights (reversed) will return
         # [Message 4, Message 3, Message 2]
@@ -0,0 +1,212 @@
+import queue
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from django.conf import settings
+from django.test import override_settings
+
+from stock_analyzer_app.stock_manager import StockManager
+from stock_analyzer_app.store import DataStore
+
+
+class StockManagerMessageTests(unittest.TestCase):
+    """
+    Tests for parsing and processing Finnhub WebSocket messages.
+    The manager is created without starting its WebSocket and worker
+    threads, messages are handed to it directly.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with patch.object(StockManager, 'start'):
+            StockManager._instance = None
+            cls.manager = StockManager('test-key')
+        cls.addClassCleanup(setattr, StockManager, '_instance', None)
+
+    def setUp(self):
+        self.data_store = DataStore.reset_for_testing()
+
+    def test_trade_message(self):
+        """Test that trades update market data and generate insights."""
+        self.manager._handle_message(
+            '{"type":"trade","data":['
+            '{"s":"AMZN","p":100.0,"t":1000,"v":5,"x":"Q"},'
+            '{"s":"amzn","p":110.0,"t":2000,"v":7}]}'
+        )
+        self.assertEqual(self.data_store.get_data("AMZN"), {
+            'type': 'trade',
+            'data': {
+                'price': 110.0, 'size': 7.0, 'timestamp': 2000,
+                'exchange': 'N/A',
+            }
+        })
+        # Market data and insights are keyed by the same interned symbol
+        self.assertIs(
+            next(iter(self.data_store.get_data())), sys.intern("AMZN")
+        )
+        insights = self.data_store.get_filtered_insights(symbol="AMZN")
+        self.assertEqual(len(insights), 1)
+        self.assertEqual(insights[0]['initial_price'], 100.0)
+        self.assertEqual(insights[0]['current_price'], 110.0)
+        self.assertEqual(insights[0]['event_timestamp_ms'], 2000)
+
+    def test_trade_size_is_volume(self):
+        """Test that the stored trade size is the volume, not the symbol."""
+        self.manager._handle_message(
+            '{"type":"trade","data":[{"s":"MSFT","p":1.0,"t":1,"v":42}]}'
+        )
+        self.assertEqual(self.data_store.get_data("MSFT")['data']['size'], 42)
+
+    def test_untracked_symbol_is_ignored(self):
+        """Test that trades of symbols not analyzed are not stored."""
+        self.manager._handle_message(
+            '{"type":"trade","data":[{"s":"TSLA","p":1.0,"t":1,"v":1}]}'
+        )
+        self.assertEqual(self.data_store.get_data(), {})
+
+    def test_malformed_trade_is_skipped(self):
+        """Test that an incomplete trade does not drop its whole frame."""
+        self.manager._handle_message(
+            '{"type":"trade","data":['
+            '{"p":5,"t":1},'
+            '{"s":"AMZN","p":100.0,"t":2,"v":1},'
+            '{"s":"GOOGL","t":3},'
+            '{"s":"MSFT","p":200.0,"t":4,"v":null}]}'
+        )
+        self.assertEqual(
+            self.data_store.get_data("AMZN")['data']['price'], 100.0
+        )
+        self.assertEqual(self.data_store.get_data("GOOGL"), {})
+        self.assertIsNone(self.data_store.get_data("MSFT")['data']['size'])
+
+    def test_ping(self):
+        """Test that pings are dropped before queueing and ignored."""
+        self.manager._on_message(None, '{"type":"ping"}')
+        self.assertTrue(self.manager._messages.empty())
+        with self.assertNoLogs('stock_analyzer_app.stock_manager', 'INFO'):
+            self.manager._handle_message('{"type":"ping"}')
+        self.assertEqual(self.data_store.get_data(), {})
+
+    def test_full_queue_blocks_receiving(self):
+        """Test that a full message queue blocks until the worker reads."""
+        self.assertEqual(
+            self.manager._messages.maxsize, StockManager.MESSAGE_QUEUE_SIZE
+        )
+        messages = queue.Queue(maxsize=1)
+        messages.put('first')
+        with patch.object(self.manager, '_messages', messages), \
+                self.assertLogs(
+                    'stock_analyzer_app.stock_manager', 'WARNING') as logs:
+            receiver = threading.Thread(
+                target=self.manager._on_message, args=(None, 'second')
+            )
+            receiver.start()
+            # Wait until the receiver found the queue full
+            deadline = time.monotonic() + 5
+            while not logs.output and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertIn("Message queue is full", logs.output[0])
+            self.assertTrue(receiver.is_alive())
+            self.assertEqual(messages.get(), 'first')
+            receiver.join(timeout=5)
+            self.assertFalse(receiver.is_alive())
+        self.assertEqual(messages.get_nowait(), 'second')
+
+    def test_error_message(self):
+        """Test that an error message is logged and changes nothing."""
+        with self.assertLogs(
+                'stock_analyzer_app.stock_manager', 'WARNING') as logs:
+            self.manager._handle_message(
+                '{"type":"error","msg":"Invalid symbol"}'
+            )
+        self.assertIn("Invalid symbol", logs.output[0])
+        self.assertEqual(self.data_store.get_data(), {})
+
+    def test_invalid_json(self):
+        """Test that undecodable messages are logged as errors."""
+        with self.assertLogs(
+                'stock_analyzer_app.stock_manager', 'ERROR') as logs:
+            self.manager._handle_message('{"type":')
+        self.assertIn("Error decoding JSON message", logs.output[0])
+
+
+class StockManagerShardingTests(unittest.TestCase):
+    """
+    Tests for distributing the analyzed symbols across WebSocket
+    connections. Managers are created without starting their threads.
+    """
+
+    def setUp(self):
+        StockManager._instance = None
+        self.addCleanup(setattr, StockManager, '_instance', None)
+
+    def create_manager(self, symbols, **config):
+        """Creates a manager for `symbols` with FINNHUB_CONFIG overrides."""
+        with override_settings(
+                STOCKS_TO_ANALYZE=symbols,
+                FINNHUB_CONFIG={**settings.FINNHUB_CONFIG, **config}), \
+                patch.object(StockManager, 'start'):
+            return StockManager('test-key')
+
+    def test_round_robin_shards(self):
+        """Test that 3 symbols over 2 connections are split round-robin."""
+        manager = self.create_manager(
+            ["msft", "AMZN", "GOOGL"], MAX_CONNECTIONS=2
+        )
+        self.assertEqual(
+            manager.symbol_shards, [("AMZN", "MSFT"), ("GOOGL",)]
+        )
+
+    def test_connections_clamped_to_symbols(self):
+        """Test that no connection is opened without symbols."""
+        manager = self.create_manager(
+            ["AMZN", "GOOGL", "MSFT"], MAX_CONNECTIONS=5
+        )
+        self.assertEqual(
+            manager.symbol_shards, [("AMZN",), ("GOOGL",), ("MSFT",)]
+        )
+
+    def test_at_least_one_connection(self):
+        """Test that MAX_CONNECTIONS below 1 still opens one connection."""
+        manager = self.create_manager(["AMZN", "MSFT"], MAX_CONNECTIONS=0)
+        self.assertEqual(manager.symbol_shards, [("AMZN", "MSFT")])
+
+    def test_symbols_per_connection_warning(self):
+        """Test the warning when a shard exceeds the per-connection limit."""
+        with self.assertLogs(
+                'stock_analyzer_app.stock_manager', 'WARNING') as logs:
+            manager = self.create_manager(
+                ["AMZN", "GOOGL", "MSFT"],
+                MAX_CONNECTIONS=1, MAX_SYMBOLS_PER_CONNECTION=2
+            )
+        self.assertEqual(len(manager.symbol_shards), 1)
+        self.assertIn("exceeds the limit of 2 symbols", logs.output[0])
+
+    def test_no_warning_within_limit(self):
+        """Test that shards within the limit log no warning."""
+        with self.assertNoLogs(
+                'stock_analyzer_app.stock_manager', 'WARNING'):
+            self.create_manager(
+                ["AMZN", "GOOGL", "MSFT"],
+                MAX_CONNECTIONS=2, MAX_SYMBOLS_PER_CONNECTION=2
+            )
+
+    def test_on_open_subscribes_shard_symbols(self):
+        """Test that each connection subscribes only to its own symbols."""
+        manager = self.create_manager(
+            ["AMZN", "GOOGL", "MSFT"], MAX_CONNECTIONS=2
+        )
+        sent = []
+        for symbols in manager.symbol_shards:
+            ws = Mock()
+            manager._on_open(ws, symbols=symbols)
+            sent.append([c.args[0] for c in ws.send.call_args_list])
+        self.assertEqual(sent, [
+            ['{"type":"subscribe","symbol":"AMZN"}',
+             '{"type":"subscribe","symbol":"MSFT"}'],
+            ['{"type":"subscribe","symbol":"GOOGL"}'],
+        ])
@@ -0,0 +1,166 @@
+import unittest
+from unittest.mock import patch
+
+import msgspec
+from django.test import Client
+
+from stock_analyzer_app import views
+from stock_analyzer_app.renderers import ORJSONRenderer
+from stock_analyzer_app.store import DataStore, Insight
+
+
+class DRFPathJSONRenderer(ORJSONRenderer):
+    """
+    Renders JSON like ORJSONRenderer, but under another format name so the
+    views take the regular DRF Response path instead of the pre-serialized
+    JSON fast path.
+    """
+    format = 'drf-json'
+
+
+class ViewTestCase(unittest.TestCase):
+    """
+    Base class for view tests: the stock manager is never started and each
+    test starts with an empty DataStore.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        manager_patcher = patch('stock_analyzer_app.views.get_stock_manager')
+        manager_patcher.start()
+        cls.addClassCleanup(manager_patcher.stop)
+
+    def setUp(self):
+        self.data_store = DataStore.reset_for_testing()
+        self.client = Client()
+
+
+class MessagePackViewTests(ViewTestCase):
+    """Tests for responses negotiated as MessagePack."""
+
+    def setUp(self):
+        super().setUp()
+        self.data_store.add_insights([
+            Insight("AMZN", 100.0, 102.0, 2.0, 1678886400000, "I1"),
+            Insight("MSFT", 200.0, 190.0, -5.0, 1678886401000, "I2"),
+        ])
+
+    def get_msgpack(self, url, method='get'):
+        response = getattr(self.client, method)(
+            url, HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        return response, msgspec.msgpack.decode(response.content)
+
+    def test_all_insights(self):
+        """Test all insights encoded as MessagePack."""
+        response, body = self.get_msgpack('/insights/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body['count'], 2)
+        self.assertEqual([i['message'] for i in body['results']], ["I2", "I1"])
+
+    def test_symbol_insights(self):
+        """Test insights of a symbol encoded as MessagePack."""
+        response, body = self.get_msgpack('/insights/amzn/?format=msgpack')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body['symbol'], "AMZN")
+        self.assertEqual([i['message'] for i in body['insights']], ["I1"])
+
+    def test_invalid_params(self):
+        """Test the 400 response for invalid query parameters."""
+        response, body = self.get_msgpack('/insights/?limit=x')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', body)
+
+    def test_method_not_allowed(self):
+        """Test that DRF's own error bodies (ErrorDetail) are encoded."""
+        response, body = self.get_msgpack('/insights/', method='post')
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(body, {'detail': 'Method "POST" not allowed.'})
+
+
+class InsightParamsTests(ViewTestCase):
+    """Tests for the validation of the insight query parameters."""
+
+    def test_negative_limit_and_offset_are_rejected(self):
+        """Test that negative limit/offset get a 400 instead of a page."""
+        for url in ('/insights/?limit=-1', '/insights/?offset=-1',
+                    '/insights/amzn/?limit=-1', '/insights/amzn/?offset=-1'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('error', response.json())
+
+    def test_negative_timestamps_are_accepted(self):
+        """Test that only limit and offset must not be negative."""
+        response = self.client.get('/insights/?from_timestamp=-1&limit=0')
+        self.assertEqual(response.status_code, 200)
+
+
+class JSONFastPathTests(ViewTestCase):
+    """
+    Tests that the JSON bodies the views assemble from pre-serialized
+    fragments are byte-identical to the DRF Response path.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Symbol and message need escaping in JSON
+        self.data_store.update_data('A"B\\', {'type': 'trade', 'data': {
+            'price': 1.5, 'size': None, 'timestamp': 1, 'exchange': 'Ü'}})
+        self.data_store.update_data('AMZN', {'type': 'trade', 'data': {
+            'price': 100.25, 'size': 3.0, 'timestamp': 2, 'exchange': 'Q'}})
+        self.data_store.add_insights([
+            Insight("AMZN", 100.0, 102.5, 2.5, 1678886400000, "I1"),
+            Insight('a"b\\', 1.0, 0.3, -70.0, 1678886401000, 'Say "é"\n'),
+            Insight("AMZN", 102.5, 90.1, -12.1, 1678886402000, "I3"),
+        ])
+
+    def assert_same_as_drf(self, url, view, accept='application/json'):
+        response = self.client.get(url, HTTP_ACCEPT=accept)
+        with patch.object(
+                view.cls, 'renderer_classes', [DRFPathJSONRenderer]):
+            expected = self.client.get(url, HTTP_ACCEPT=accept)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        self.assertEqual(response.content, expected.content)
+
+    def test_all_insights(self):
+        """Test /insights/ against the DRF Response path."""
+        for query in ('', '?limit=2',
+                      '?offset=1&from_timestamp=1678886400001'):
+            self.assert_same_as_drf(
+                '/insights/' + query, views.get_all_stock_insights
+            )
+
+    def test_symbol_insights(self):
+        """Test /insights/<symbol>/ against the DRF Response path."""
+        for symbol in ('amzn', 'A%22b%5C', 'UNKNOWN'):
+            self.assert_same_as_drf(
+                f'/insights/{symbol}/', views.get_symbol_stock_insights
+            )
+
+    def test_indented_insights(self):
+        """Test that requested indentation bypasses the fast path."""
+        accept = 'application/json; indent=4'
+        self.assert_same_as_drf(
+            '/insights/', views.get_all_stock_insights, accept
+        )
+        self.assert_same_as_drf(
+            '/insights/amzn/', views.get_symbol_stock_insights, accept
+        )
+        response = self.client.get('/insights/amzn/', HTTP_ACCEPT=accept)
+        self.assertIn(b'\n', response.content)
+
+    def test_all_market_data(self):
+        """Test /market-data/ against the DRF Response path."""
+        self.assert_same_as_drf('/market-data/', views.get_cached_market_data)
+
+    def test_indented_market_data(self):
+        """Test that requested indentation bypasses the cached JSON."""
+        accept = 'application/json; indent=4'
+        self.assert_same_as_drf(
+            '/market-data/', views.get_cached_market_data, accept
+        )
+        response = self.client.get('/market-data/', HTTP_ACCEPT=accept)
+        self.assertIn(b'\n', response.content)
@@ -1,4 +1,9 @@
 import logging
+import sys
+import threading
+from collections.abc import Mapping
+import orjson
+from django.http import HttpResponse
 from django.shortcuts import render
 from django.views.generic import TemplateView
 from rest_framework.decorators import api_view
@@ -9,9 +14,175 @@ from drf_spectacular.utils import (
 )
 from django.conf import settings
 
-from stock_analyzer_app.store import DataStore
+from stock_analyzer_app.store import DataStore, canonical_symbol
 from stock_analyzer_app.stock_manager import get_stock_manager
 
+# Bound on the first request, see _bootstrap()
+_data_store = None
+_bootstrap_lock = threading.Lock()
+
+
+def _bootstrap():
+    """
+    Starts the stock manager on the first request and returns the data
+    store. After that it is a single `is None` check per request.
+    """
+    global _data_store
+    if _data_store is None:
+        with _bootstrap_lock:
+            if _data_store is None:
+                # a weird fix for deployable single process worker since we
+                # are using in memory storage and not external
+                get_stock_manager()
+                _data_store = DataStore()
+    return _data_store
+
+# Canonical (uppercase, interned) monitored symbols keyed by the spellings
+# clients normally use, so most requests skip the per-request upper() and
+# hand the store the same string object its insights are keyed by
+_SYMBOL_CACHE = {
+    spelling: sys.intern(symbol.upper())
+    for symbol in settings.STOCKS_TO_ANALYZE
+    for spelling in (symbol, symbol.upper(), symbol.lower())
+}
+
+
+def _canonical_symbol(symbol):
+    """Returns the uppercase form of a symbol from the path."""
+    return _SYMBOL_CACHE.get(symbol) or canonical_symbol(symbol)
+
+# Integer query parameters accepted by the insight views
+_INSIGHT_INT_PARAMS = ('from_timestamp', 'to_timestamp', 'limit', 'offset')
+# Of those, the ones that must not be negative
+_NON_NEGATIVE_PARAMS = frozenset(('limit', 'offset'))
+
+
+def _parse_int_params(
+        query_params: Mapping[str, str],
+        names: tuple[str, ...] = _INSIGHT_INT_PARAMS
+) -> dict[str, int | None] | None:
+    """
+    Converts the given query parameters to int (None when not provided).
+    Returns None if any of them is not a valid integer, or is negative
+    while listed in _NON_NEGATIVE_PARAMS.
+    """
+    params: dict[str, int | None] = {}
+    for name in names:
+        value = query_params.get(name)
+        if not value:
+            params[name] = None
+            continue
+        try:
+            number = int(value)
+        except ValueError:
+            return None
+        if number < 0 and name in _NON_NEGATIVE_PARAMS:
+            return None
+        params[name] = number
+    return params
+
+
+def _invalid_params_response():
+    return Response(
+        data={
+            'error': 'Invalid timestamp, limit, or offset format. '
+                     'Must be integers, limit and offset must not be '
+                     'negative.'
+        },
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _use_json_fast_path(request) -> bool:
+    """
+    Returns whether the response can be assembled from pre-serialized JSON:
+    only for compact JSON, the fragments are not indented.
+    """
+    renderer = request.accepted_renderer
+    return renderer.format == 'json' and not renderer.get_indent(
+        request.accepted_media_type, {}
+    )
+
+
+def _serve_insights(request, symbol):
+    """
+    Builds the response of the insight views: insights of all symbols
+    (symbol=None) as `count`/`results`, or of a single canonical symbol as
+    `symbol`/`insights`.
+    """
+    ds = _bootstrap()
+
+    # Parse query parameters and convert them to int
+    params = _parse_int_params(request.query_params)
+    if params is None:
+        return _invalid_params_response()
+
+    if _use_json_fast_path(request):
+        # Assemble the body from the insights' pre-serialized JSON
+        fragments = ds.get_filtered_insights_json(symbol=symbol, **params)
+        if symbol:
+            body = (b'{"symbol":%b,"insights":[%b]}'
+                    % (orjson.dumps(symbol), b','.join(fragments)))
+        else:
+            body = (b'{"count":%d,"results":[%b]}'
+                    % (len(fragments), b','.join(fragments)))
+        return HttpResponse(body, content_type='application/json')
+
+    # Get filtered and paginated insights from the store
+    filtered_insights = ds.get_filtered_insights(symbol=symbol, **params)
+    if symbol:
+        data = {'symbol': symbol, 'insights': filtered_insights}
+    else:
+        data = {'count': len(filtered_insights), 'results': filtered_insights}
+    return Response(data, status=status.HTTP_200_OK)
+
+
+# OpenAPI parameters shared by the insight views
+_INSIGHT_QUERY_PARAMETERS = [
+    OpenApiParameter(
+        name='from_timestamp',
+        type=int,
+        location=OpenApiParameter.QUERY,
+        description='Start timestamp (Unix milliseconds) for filtering '
+                    'insights. Insights with `event_timestamp_ms` less '
+                    'than this will be excluded.',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='to_timestamp',
+        type=int,
+        location=OpenApiParameter.QUERY,
+        description='End timestamp (Unix milliseconds) for filtering '
+                    'insights. Insights with `event_timestamp_ms` greater '
+                    'than this will be excluded.',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='limit',
+        type=int,
+        location=OpenApiParameter.QUERY,
+        description='Maximum number of insights to return in the response.'
+                    ' Default is no limit.',
+        required=False,
+    ),
+    OpenApiParameter(
+        name='offset',
+        type=int,
+        location=OpenApiParameter.QUERY,
+        description='Number of insights to skip from the beginning of the '
+                    'filtered results. Default is 0.',
+        required=False,
+    ),
+]
+_SYMBOL_ENUM = tuple(s.upper() for s in settings.STOCKS_TO_ANALYZE)
+_INSIGHTS_DESCRIPTION_SUFFIX = (
+    f"Insights are generated based on a "
+    f"{settings.PRICE_CHANGE_THRESHOLD}% price change threshold for "
+    f"real-time trades. Results can be filtered by a timestamp range and "
+    f"paginated."
+)
+
+
 # API View for Market Data
 @extend_schema(
     summary="Retrieve cached real-time market data (Trades)",
@@ -41,17 +212,14 @@ from stock_analyzer_app.stock_manager import get_stock_manager
 )
 @api_view(['GET'])
 def get_cached_market_data(request, symbol=None):
-    # a weird fix for deployable single process worker since we are using
-    # in memory storage and not external
-    get_stock_manager()
-
-    ds = DataStore()
+    ds = _bootstrap()
     if symbol:
-        data = ds.get_data(symbol)
+        canonical = _canonical_symbol(symbol)
+        data = ds.get_data(canonical)
         if data:
             return Response(
                 data={
-                    'symbol': symbol.upper(),
+                    'symbol': canonical,
                     'data': data
                 },
                 status=status.HTTP_200_OK
@@ -62,6 +230,12 @@ def get_cached_market_data(request, symbol=None):
                 status=status.HTTP_404_NOT_FOUND
             )
     else:
+        if _use_json_fast_path(request):
+            # The encoded market data is cached by the store between updates
+            return HttpResponse(
+                b'{"all_market_data":%b}' % ds.get_data_json(),
+                content_type='application/json'
+            )
         all_data = ds.get_data()
         return Response(
             data={'all_market_data': all_data},
@@ -73,47 +247,9 @@ def get_cached_market_data(request, symbol=None):
 @extend_schema(
     summary="Retrieve all significant stock price change insights with "
             "filtering and pagination",
-    description=f"Fetches recorded significant price changes for all monitored"
-                f" stocks. Insights are generated based on a "
-                f"{settings.PRICE_CHANGE_THRESHOLD}% price change threshold "
-                f"for real-time trades. Results can be filtered by a "
-                f"timestamp range and paginated.",
-    parameters=[
-        OpenApiParameter(
-            name='from_timestamp',
-            type=int,
-            location=OpenApiParameter.QUERY,
-            description='Start timestamp (Unix milliseconds) for filtering '
-                        'insights. Insights with `event_timestamp_ms` less '
-                        'than this will be excluded.',
-            required=False,
-        ),
-        OpenApiParameter(
-            name='to_timestamp',
-            type=int,
-            location=OpenApiParameter.QUERY,
-            description='End timestamp (Unix milliseconds) for filtering '
-                        'insights. Insights with `event_timestamp_ms` greater '
-                        'than this will be excluded.',
-            required=False,
-        ),
-        OpenApiParameter(
-            name='limit',
-            type=int,
-            location=OpenApiParameter.QUERY,
-            description='Maximum number of insights to return in the response.'
-                        ' Default is no limit.',
-            required=False,
-        ),
-        OpenApiParameter(
-            name='offset',
-            type=int,
-            location=OpenApiParameter.QUERY,
-            description='Number of insights to skip from the beginning of the '
-                        'filtered results. Default is 0.',
-            required=False,
-        ),
-    ],
+    description="Fetches recorded significant price changes for all monitored"
+                " stocks. " + _INSIGHTS_DESCRIPTION_SUFFIX,
+    parameters=_INSIGHT_QUERY_PARAMETERS,
     responses={
         200: {
             'description': 'Successful retrieval of insights.',
@@ -122,55 +258,15 @@ def get_cached_market_data(request, symbol=None):
 )
 @api_view(['GET'])
 def get_all_stock_insights(request):
-    # a weird fix for deployable single process worker since we are using
-    # in memory storage and not external
-    get_stock_manager()
-
-    # Parse query parameters
-    from_timestamp = request.query_params.get('from_timestamp')
-    to_timestamp = request.query_params.get('to_timestamp')
-    limit = request.query_params.get('limit')
-    offset = request.query_params.get('offset')
-
-    # Convert parameters to appropriate types (int)
-    try:
-        from_timestamp = int(from_timestamp) if from_timestamp else None
-        to_timestamp = int(to_timestamp) if to_timestamp else None
-        limit = int(limit) if limit else None
-        offset = int(offset) if offset else None
-    except ValueError:
-        return Response(
-            data={
-                'error': 'Invalid timestamp, limit, or offset format. '
-                         'Must be integers.'
-            },
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
-    # Get filtered and paginated insights from the store (symbol=None for all)
-    filtered_insights = DataStore().get_filtered_insights(
-        symbol=None,
-        from_timestamp=from_timestamp,
-        to_timestamp=to_timestamp,
-        limit=limit,
-        offset=offset
-    )
-
-    return Response({
-        'count': len(filtered_insights),
-        'results': filtered_insights
-    }, status=status.HTTP_200_OK)
+    return _serve_insights(request, symbol=None)
 
 
 # MODIFIED: API View for Single Symbol Stock Analysis Insights
 @extend_schema(
     summary="Retrieve significant stock price change insights for a specific "
             "symbol with filtering and pagination",
-    description=f"Fetches recorded significant price changes for a specific "
-                f"stock ticker symbol. Insights are generated based on a "
-                f"{settings.PRICE_CHANGE_THRESHOLD}% price change threshold "
-                f"for real-time trades. Results can be filtered by a timestamp"
-                f" range and paginated.",
+    description="Fetches recorded significant price changes for a specific "
+                "stock ticker symbol. " + _INSIGHTS_DESCRIPTION_SUFFIX,
     parameters=[
         OpenApiParameter(
             name='symbol',
@@ -179,39 +275,9 @@ def get_all_stock_insights(request):
             description=f'The stock ticker symbol (AMZN, MSFT, GOOGL) '
                         f'for which to retrieve insights.',
             required=True, # Symbol is required for this path
-            enum=[s.upper() for s in settings.STOCKS_TO_ANALYZE]
-        ),
-        OpenApiParameter(
-            name='from_timestamp',
-            type=int,
-            location=OpenApiParameter.QUERY,
-            description='Start timestamp (Unix milliseconds) for filtering '
-                        'insights. Insights with `event_timestamp_ms` '
-                        'less than this will be excluded.',
-            required=False,
-        ),
-        OpenApiParameter(
-            name='to_timestamp',
-            type=int,
-            location=OpenApiParameter.QUERY,
-            description='End timestamp (Unix milliseconds) for filtering insights. Insights with `event_timestamp_ms` greater than this will be excluded.',
-            required=False,
-        ),
-        OpenApiParameter(
-            name='limit',
-            type=int,
-            location=OpenApiParameter.QUERY,
-            description='Maximum number of insights to return in the response. Default is no limit.',
-            required=False,
-        ),
-        OpenApiParameter(
-            name='offset',
-            type=int,
-            location=OpenApiParameter.QUERY,
-            description='Number of insights to skip from the beginning of the '
-                        'filtered results. Default is 0.',
-            required=False,
+            enum=_SYMBOL_ENUM
         ),
+        *_INSIGHT_QUERY_PARAMETERS,
     ],
     responses={
         200: {
@@ -224,7 +290,6 @@ def get_all_stock_insights(request):
 )
 @api_view(['GET'])
 def get_symbol_stock_insights(request, symbol):
-
     """
     API View for retrieving significant stock price change insights for a
     specific symbol. This view allows filtering by timestamp, range and
@@ -234,63 +299,28 @@ def get_symbol_stock_insights(request, symbol):
     :param symbol: The stock ticker symbol (GOOGL, AMZN, MSFT) for which to
                     retrieve insights.
     """
-    # a weird fix for deployable single process worker since we are using
-    # in memory storage and not external
-    get_stock_manager()
-
-    # Parse query parameters
-    from_timestamp = request.query_params.get('from_timestamp')
-    to_timestamp = request.query_params.get('to_timestamp')
-    limit = request.query_params.get('limit')
-    offset = request.query_params.get('offset')
-
-    try:
-        from_timestamp = int(from_timestamp) if from_timestamp else None
-        to_timestamp = int(to_timestamp) if to_timestamp else None
-        limit = int(limit) if limit else None
-        offset = int(offset) if offset else None
-    except ValueError:
-        return Response(
-            data={
-                'error': 'Invalid timestamp, limit, or offset format. '
-                         'Must be integers.'
-            },
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    return _serve_insights(request, symbol=_canonical_symbol(symbol))
 
-    # Get filtered and paginated insights for the specific symbol
-    filtered_insights = DataStore().get_filtered_insights(
-        symbol=symbol, # Pass the symbol from the path
-        from_timestamp=from_timestamp,
-        to_timestamp=to_timestamp,
-        limit=limit,
-        offset=offset
-    )
 
-    # For /insights/<symbol>/, return insights under an 'insights' key
-    return Response({
-        'symbol': symbol.upper(),
-        'insights': filtered_insights
-    }, status=status.HTTP_200_OK)
+# The API tester is a static page (no template tags), read it once
+_API_TESTER_HTML = (
+    settings.BASE_DIR / 'templates' / 'api_tester.html'
+).read_bytes()
 
 
 # View for the HTML Test Page
 def api_tester_page(request):
     """
-    Renders the HTML page for interactively testing the REST API.
+    Serves the HTML page for interactively testing the REST API.
+    The stock manager is started by the API calls the page makes.
     """
-    # a weird fix for deployable single process worker since we are using
-    # in memory storage and not external
-    get_stock_manager()
-    get_stock_manager()
-    # No context needed for this simple static page
-    return render(request, 'api_tester.html', {})
+    return HttpResponse(
+        _API_TESTER_HTML, content_type='text/html; charset=utf-8'
+    )
 
 def index_page(request):
     """
     Renders the index page of the application.
     """
-    # a weird fix for deployable single process worker since we are using
-    # in memory storage and not external
-    get_stock_manager()
+    _bootstrap()
     return render(request, 'index.html', {})
\ No newline at end of file
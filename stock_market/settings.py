@@ -118,6 +118,14 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        # Used for the app loggers, which log from the WebSocket threads:
+        # records are handed to a background thread instead of being written
+        # synchronously
+        'queued_console': {
+            '()': 'stock_analyzer_app.log_handlers.QueuedStreamHandler',
+            'level': 'DEBUG',
+            'formatter': 'verbose',
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -139,6 +147,11 @@ LOGGING = {
             'level': 'DEBUG',  # Show only your app's logs
             'propagate': False,
         },
+        'stock_analyzer_app': {
+            'handlers': ['queued_console'],
+            'level': 'DEBUG',
+            'propagate': False,
+        },
     },
 }
 
@@ -151,6 +164,12 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny', # Explicitly allows access for all
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema', # Link DRF with drf-spectacular
+    # JSON by default, MessagePack for clients that ask for it
+    'DEFAULT_RENDERER_CLASSES': (
+        'stock_analyzer_app.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'stock_analyzer_app.renderers.MessagePackRenderer',
+    ),
 }
 
 # drf-spectacular settings
@@ -175,4 +194,8 @@ FINNHUB_CONFIG = {
     # !!! IMPORTANT: Replace 'YOUR_FINNHUB_API_KEY' with your actual API key !!!
     'API_KEY': os.environ.get('FINHUB_API_KEY'), # REPLACE THIS!
     'WEBSOCKET_URL': 'wss://ws.finnhub.io', # Base URL without token
+    # Symbols are split across this many WebSocket connections
+    # (the free Finnhub plan allows a single connection per API key)
+    'MAX_CONNECTIONS': int(os.environ.get('FINNHUB_MAX_CONNECTIONS', 1)),
+    'MAX_SYMBOLS_PER_CONNECTION': 50,
 }
\ No newline at end of file